@@ -25,6 +25,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Metadata headers on response_format=binary responses
+    expose_headers=["X-Image-Width", "X-Image-Height", "X-Grid", "X-Prompt-Prefix", "X-UX-Review-Prompt"],
 )
 
 # Include routers
@@ -56,7 +58,12 @@ async def capabilities():
         "version": "1.1.0",
         "description": "General-purpose Python execution service for image processing and document generation.",
         "packages": {
-            "pillow": "11.0.0",
+            "pillow-simd": "11.0.0.post0",
+            "numpy": "2.1.3",
+            "numba": "0.61.0",
+            "pybase64": "1.4.0",
+            "pyvips": "2.2.3",
+            "cachetools": "5.5.0",
             "fastapi": "0.115.0",
             "httpx": "0.27.0",
         },
@@ -69,8 +76,8 @@ async def capabilities():
                     "UX screenshot review with spatial references",
                     "Vision LLM coordinate-based analysis",
                 ],
-                "input": "image_base64 (string), grid_size (2-26), alpha (0.1-1.0)",
-                "output": "image_base64 with grid overlay",
+                "input": "image_base64 (string), grid_size (2-26), alpha (0.1-1.0), response_format (json|binary)",
+                "output": "image_base64 with grid overlay (binary: raw image, prompts in X-Prompt-Prefix/X-UX-Review-Prompt headers)",
             },
             {
                 "path": "/image/resize",
@@ -80,8 +87,8 @@ async def capabilities():
                     "Prepare images for LLM context limits",
                     "Standardize dimensions for comparison",
                 ],
-                "input": "image_base64, width/height/max_dimension",
-                "output": "image_base64 resized, width, height",
+                "input": "image_base64, width/height/max_dimension, response_format (json|binary)",
+                "output": "image_base64 resized, width, height (binary: raw image, X-Image-Width/X-Image-Height headers)",
             },
             {
                 "path": "/image/montage",
@@ -92,8 +99,8 @@ async def capabilities():
                     "Before/after comparisons",
                     "Multi-image context for vision LLMs",
                 ],
-                "input": "images (array of base64), columns, spacing, labels",
-                "output": "image_base64 combined montage",
+                "input": "images (array of base64), columns, spacing, labels, response_format (json|binary)",
+                "output": "image_base64 combined montage (binary: raw image, X-Image-Width/X-Image-Height/X-Grid headers)",
             },
         ],
         "planned": [
@@ -2,15 +2,42 @@
 Image processing endpoints.
 """
 
-from fastapi import APIRouter, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from urllib.parse import quote
+import asyncio
+import math
+import os
+
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageColor, ImageDraw
+import numpy as np
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 
-from app.tasks.grid_overlay import process_base64, get_ux_review_prompt, GRID_PROMPT_PREFIX
+from app.tasks.grid_overlay import process_to_buffer, get_ux_review_prompt, GRID_PROMPT_PREFIX
+from app.tasks.fonts import get_font
+from app.tasks import vips_montage
+from app.tasks.image_io import decode_bytes, decode_image, encode_bytes, save_image, to_rgb_or_rgba
+from app.tasks.result_cache import get_result, make_key, store_result
 
 
 router = APIRouter(prefix="/image", tags=["image"])
 
+# Height of the label strip under (or above) each montage cell
+MONTAGE_LABEL_HEIGHT = 25
+
+# Shared pool for decoding montage inputs concurrently
+_DECODE_POOL = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4), thread_name_prefix="decode")
+
+
+def _binary_response(data: bytes, output_format: str, headers: dict[str, str]) -> Response:
+    """Return encoded image bytes directly, skipping the base64 JSON envelope."""
+    media_type = 'image/jpeg' if output_format.lower() in ['jpg', 'jpeg'] else 'image/png'
+    return Response(content=data, media_type=media_type, headers=headers)
+
 
 class GridOverlayRequest(BaseModel):
     """Request model for grid overlay endpoint."""
@@ -20,6 +47,7 @@ class GridOverlayRequest(BaseModel):
     margin: int = Field(default=15, ge=5, le=50, description="Label margin in pixels")
     output_format: str = Field(default="png", pattern="^(png|jpeg|jpg)$", description="Output format")
     include_prompt: bool = Field(default=False, description="Include UX review prompt in response")
+    response_format: str = Field(default="json", pattern="^(json|binary)$", description="json (base64 body) or binary (raw image bytes)")
 
 
 class GridOverlayResponse(BaseModel):
@@ -29,8 +57,41 @@ class GridOverlayResponse(BaseModel):
     ux_review_prompt: Optional[str] = Field(None, description="Full UX review prompt (if requested)")
 
 
+def _do_grid_overlay(request: GridOverlayRequest) -> Union[GridOverlayResponse, Response]:
+    """Synchronous grid overlay work for /image/grid-overlay (runs in the threadpool)."""
+    # Identical repeat requests are served from the result cache
+    params = dict(
+        grid_size=request.grid_size,
+        alpha=request.alpha,
+        margin=request.margin,
+        output_format=request.output_format,
+    )
+    key = make_key("grid-overlay", request.image_base64, params)
+    cached = get_result(key)
+    if cached is None:
+        data = process_to_buffer(image_base64=request.image_base64, **params).getvalue()
+        store_result(key, data)
+    else:
+        data, _ = cached
+
+    if request.response_format == "binary":
+        headers = {}
+        if request.include_prompt:
+            headers["X-Prompt-Prefix"] = quote(GRID_PROMPT_PREFIX)
+            headers["X-UX-Review-Prompt"] = quote(get_ux_review_prompt())
+        return _binary_response(data, request.output_format, headers)
+
+    response = GridOverlayResponse(image_base64=encode_bytes(data))
+
+    if request.include_prompt:
+        response.prompt_prefix = GRID_PROMPT_PREFIX
+        response.ux_review_prompt = get_ux_review_prompt()
+
+    return response
+
+
 @router.post("/grid-overlay", response_model=GridOverlayResponse)
-async def grid_overlay(request: GridOverlayRequest) -> GridOverlayResponse:
+async def grid_overlay(request: GridOverlayRequest) -> Union[GridOverlayResponse, Response]:
     """
     Add a reference grid overlay to an image for AI vision analysis.
 
@@ -38,23 +99,14 @@ async def grid_overlay(request: GridOverlayRequest) -> GridOverlayResponse:
     Useful for spatial references when reviewing screenshots with vision LLMs.
 
     Based on Grid-Augmented Vision research (arXiv:2411.18270).
+
+    With response_format="binary", the image is returned as raw bytes and the
+    prompts (if requested) are sent URL-encoded in X-Prompt-Prefix and
+    X-UX-Review-Prompt headers.
     """
     try:
-        result_base64 = process_base64(
-            image_base64=request.image_base64,
-            grid_size=request.grid_size,
-            alpha=request.alpha,
-            margin=request.margin,
-            output_format=request.output_format,
-        )
-
-        response = GridOverlayResponse(image_base64=result_base64)
-
-        if request.include_prompt:
-            response.prompt_prefix = GRID_PROMPT_PREFIX
-            response.ux_review_prompt = get_ux_review_prompt()
-
-        return response
+        # Run the CPU-bound work off the event loop so /health stays responsive
+        return await run_in_threadpool(_do_grid_overlay, request)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Image processing failed: {str(e)}")
@@ -68,6 +120,7 @@ class ResizeRequest(BaseModel):
     max_dimension: Optional[int] = Field(None, ge=1, le=4096, description="Max width or height (preserves aspect)")
     output_format: str = Field(default="png", pattern="^(png|jpeg|jpg)$", description="Output format")
     quality: int = Field(default=85, ge=1, le=100, description="JPEG quality (if jpeg format)")
+    response_format: str = Field(default="json", pattern="^(json|binary)$", description="json (base64 body) or binary (raw image bytes)")
 
 
 class ResizeResponse(BaseModel):
@@ -77,65 +130,98 @@ class ResizeResponse(BaseModel):
     height: int = Field(..., description="Output height")
 
 
+def _render_resize(request: ResizeRequest) -> tuple[bytes, int, int]:
+    """Decode, resize and encode for /image/resize. Returns (image bytes, width, height)."""
+    # Decode input
+    img = decode_image(request.image_base64)
+    orig_w, orig_h = img.size
+
+    # Calculate target dimensions
+    if request.max_dimension:
+        # Scale to fit within max_dimension
+        ratio = min(request.max_dimension / orig_w, request.max_dimension / orig_h)
+        new_w = int(orig_w * ratio)
+        new_h = int(orig_h * ratio)
+    elif request.width and request.height:
+        # Exact dimensions
+        new_w, new_h = request.width, request.height
+    elif request.width:
+        # Scale by width, preserve aspect
+        ratio = request.width / orig_w
+        new_w = request.width
+        new_h = int(orig_h * ratio)
+    elif request.height:
+        # Scale by height, preserve aspect
+        ratio = request.height / orig_h
+        new_w = int(orig_w * ratio)
+        new_h = request.height
+    else:
+        raise HTTPException(status_code=400, detail="Must provide width, height, or max_dimension")
+
+    if new_w < 1 or new_h < 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Target size {new_w}x{new_h} is too small for a {orig_w}x{orig_h} image",
+        )
+
+    # JPEG fast path: decode at a reduced DCT scale (1/2, 1/4, 1/8) that still
+    # covers the target size, so the final resize starts from fewer pixels
+    if img.format == 'JPEG':
+        img.draft('RGB', (new_w, new_h))
+
+    # Resize
+    result = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+    # Convert to RGB if saving as JPEG
+    if request.output_format.lower() in ['jpg', 'jpeg']:
+        if result.mode in ('RGBA', 'P'):
+            result = result.convert('RGB')
+
+    # Encode output
+    save_kwargs = {}
+    if request.output_format.lower() in ['jpg', 'jpeg']:
+        save_kwargs['quality'] = request.quality
+    else:
+        save_kwargs['compress_level'] = 1
+
+    buffer = save_image(result, request.output_format.upper(), **save_kwargs)
+    return buffer.getvalue(), new_w, new_h
+
+
+def _do_resize(request: ResizeRequest) -> Union[ResizeResponse, Response]:
+    """Synchronous resize work for /image/resize (runs in the threadpool)."""
+    # Identical repeat requests are served from the result cache
+    key = make_key("resize", request.image_base64, request.model_dump(exclude={"image_base64", "response_format"}))
+    cached = get_result(key)
+    if cached is None:
+        data, new_w, new_h = _render_resize(request)
+        store_result(key, data, {"width": new_w, "height": new_h})
+    else:
+        data, meta = cached
+        new_w, new_h = meta["width"], meta["height"]
+
+    if request.response_format == "binary":
+        return _binary_response(data, request.output_format, {
+            "X-Image-Width": str(new_w),
+            "X-Image-Height": str(new_h),
+        })
+
+    return ResizeResponse(
+        image_base64=encode_bytes(data),
+        width=new_w,
+        height=new_h,
+    )
+
+
 @router.post("/resize", response_model=ResizeResponse)
-async def resize_image(request: ResizeRequest) -> ResizeResponse:
+async def resize_image(request: ResizeRequest) -> Union[ResizeResponse, Response]:
     """
     Resize an image with various options.
 
     Provide width and/or height for exact dimensions, or max_dimension to limit size while preserving aspect ratio.
     """
-    from PIL import Image
-    from io import BytesIO
-    import base64
-
     try:
-        # Decode input
-        image_data = base64.b64decode(request.image_base64)
-        img = Image.open(BytesIO(image_data))
-        orig_w, orig_h = img.size
-
-        # Calculate target dimensions
-        if request.max_dimension:
-            # Scale to fit within max_dimension
-            ratio = min(request.max_dimension / orig_w, request.max_dimension / orig_h)
-            new_w = int(orig_w * ratio)
-            new_h = int(orig_h * ratio)
-        elif request.width and request.height:
-            # Exact dimensions
-            new_w, new_h = request.width, request.height
-        elif request.width:
-            # Scale by width, preserve aspect
-            ratio = request.width / orig_w
-            new_w = request.width
-            new_h = int(orig_h * ratio)
-        elif request.height:
-            # Scale by height, preserve aspect
-            ratio = request.height / orig_h
-            new_w = int(orig_w * ratio)
-            new_h = request.height
-        else:
-            raise HTTPException(status_code=400, detail="Must provide width, height, or max_dimension")
-
-        # Resize
-        result = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-        # Convert to RGB if saving as JPEG
-        if request.output_format.lower() in ['jpg', 'jpeg']:
-            if result.mode in ('RGBA', 'P'):
-                result = result.convert('RGB')
-
-        # Encode output
-        buffer = BytesIO()
-        save_kwargs = {}
-        if request.output_format.lower() in ['jpg', 'jpeg']:
-            save_kwargs['quality'] = request.quality
-        result.save(buffer, format=request.output_format.upper(), **save_kwargs)
-
-        return ResizeResponse(
-            image_base64=base64.b64encode(buffer.getvalue()).decode('utf-8'),
-            width=new_w,
-            height=new_h,
-        )
+        return await run_in_threadpool(_do_resize, request)
 
     except HTTPException:
         raise
@@ -148,11 +234,12 @@ class MontageRequest(BaseModel):
     images: List[str] = Field(..., min_length=2, max_length=25, description="Array of base64-encoded images")
     columns: Optional[int] = Field(None, ge=1, le=10, description="Number of columns (auto-calculated if not provided)")
     spacing: int = Field(default=10, ge=0, le=100, description="Spacing between images in pixels")
-    background_color: str = Field(default="#FFFFFF", description="Background color (hex)")
+    background_color: str = Field(default="#FFFFFF", description="Background color (hex or CSS color name)")
     labels: Optional[List[str]] = Field(None, description="Optional labels for each image")
     label_position: str = Field(default="bottom", pattern="^(top|bottom)$", description="Label position")
     max_cell_width: Optional[int] = Field(None, ge=50, le=2048, description="Max width per cell (scales down if needed)")
     output_format: str = Field(default="png", pattern="^(png|jpeg|jpg)$", description="Output format")
+    response_format: str = Field(default="json", pattern="^(json|binary)$", description="json (base64 body) or binary (raw image bytes)")
 
 
 class MontageResponse(BaseModel):
@@ -163,8 +250,196 @@ class MontageResponse(BaseModel):
     grid: str = Field(..., description="Grid dimensions (e.g., '3x2')")
 
 
+@lru_cache(maxsize=256)
+def _parse_color(color: str) -> tuple[int, int, int]:
+    """Parse a hex or CSS color name to RGB."""
+    try:
+        return ImageColor.getcolor(color, 'RGB')
+    except ValueError:
+        # Accept bare hex without the leading '#'
+        return ImageColor.getcolor(f"#{color}", 'RGB')
+
+
+def _montage_grid(request: MontageRequest) -> tuple[int, int]:
+    """Calculate grid dimensions as (columns, rows)."""
+    n = len(request.images)
+    if request.columns:
+        cols = request.columns
+    else:
+        # Auto-calculate: prefer roughly square grids
+        cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    return cols, rows
+
+
+def _montage_save_format(request: MontageRequest) -> str:
+    """Pillow/libvips output format name for the request."""
+    return 'JPEG' if request.output_format.lower() in ['jpg', 'jpeg'] else 'PNG'
+
+
+def _montage_response(
+    request: MontageRequest,
+    data: bytes,
+    canvas_w: int,
+    canvas_h: int,
+    cols: int,
+    rows: int,
+) -> Union[MontageResponse, Response]:
+    """Wrap encoded montage bytes in the requested response format."""
+    if request.response_format == "binary":
+        return _binary_response(data, request.output_format, {
+            "X-Image-Width": str(canvas_w),
+            "X-Image-Height": str(canvas_h),
+            "X-Grid": f"{cols}x{rows}",
+        })
+
+    return MontageResponse(
+        image_base64=encode_bytes(data),
+        width=canvas_w,
+        height=canvas_h,
+        grid=f"{cols}x{rows}",
+    )
+
+
+def _open_montage_image(img_b64: str, index: int) -> tuple[bytes, Image.Image]:
+    """
+    Decode one montage input's base64 and open it, reading only its header
+    (runs on the decode pool). Returns (encoded bytes, opened image).
+    """
+    try:
+        data = decode_bytes(img_b64)
+        return data, Image.open(BytesIO(data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to decode image {index}: {str(e)}")
+
+
+def _montage_target(img: Image.Image, scale: Optional[float], index: int) -> Optional[tuple[int, int]]:
+    """Scaled size of one montage input, or None when it is used at full size."""
+    if scale is None:
+        return None
+    target = (int(img.width * scale), int(img.height * scale))
+    if target[0] < 1 or target[1] < 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image {index} ({img.width}x{img.height}) is too small to scale to max_cell_width",
+        )
+    return target
+
+
+def _load_montage_image(img: Image.Image, target: Optional[tuple[int, int]], index: int) -> Image.Image:
+    """
+    Decode and scale one montage input (runs on the decode pool).
+
+    When downscaling a JPEG, it is decoded at a reduced DCT scale that still
+    covers the target size. Inputs with real transparency come back as RGBA
+    so they can be pasted with a mask; everything else is RGB and is pasted
+    as a plain copy.
+    """
+    try:
+        if target is not None and img.format == 'JPEG':
+            img.draft('RGB', target)
+
+        # Decode now. Pillow keeps the input bytes (img.fp) alive until this
+        # image is replaced by a converted or resized copy below
+        img.load()
+        img = to_rgb_or_rgba(img)
+
+        if target is not None:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+        return img
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to decode image {index}: {str(e)}")
+
+
+def _build_montage(
+    request: MontageRequest,
+    images: List[Image.Image],
+    max_w: int,
+    max_h: int,
+) -> Union[MontageResponse, Response]:
+    """Synchronous layout and encode work for /image/montage (runs in the threadpool)."""
+    cols, rows = _montage_grid(request)
+
+    # Add space for labels if provided
+    label_height = MONTAGE_LABEL_HEIGHT if request.labels else 0
+
+    # Calculate canvas size
+    cell_w = max_w + request.spacing
+    cell_h = max_h + request.spacing + label_height
+    canvas_w = cols * cell_w + request.spacing
+    canvas_h = rows * cell_h + request.spacing
+
+    # Parse background color
+    bg_rgb = _parse_color(request.background_color)
+
+    # Cell positions (images centered horizontally in their cell)
+    positions = []
+    for i, img in enumerate(images):
+        row = i // cols
+        col = i % cols
+        x = col * cell_w + request.spacing + (max_w - img.width) // 2
+        y = row * cell_h + request.spacing
+        if request.label_position == "top" and request.labels:
+            y += label_height
+        positions.append((row, col, x, y))
+
+    # Build the canvas as an array: opaque images are plain block copies,
+    # transparent ones are alpha-blended over the background.
+    # (Background is opaque, so RGB works for both PNG and JPEG.)
+    canvas_arr = np.full((canvas_h, canvas_w, 3), bg_rgb, dtype=np.uint8)
+    for img, (_, _, x, y) in zip(images, positions):
+        tile = np.asarray(img)
+        region = canvas_arr[y:y + img.height, x:x + img.width]
+        if img.mode == 'RGBA':
+            alpha = tile[..., 3:].astype(np.uint16)
+            region[...] = ((tile[..., :3] * alpha + region * (255 - alpha) + 127) // 255).astype(np.uint8)
+        else:
+            region[...] = tile
+    canvas = Image.fromarray(canvas_arr, mode='RGB')
+
+    # Add labels
+    if request.labels:
+        font = get_font(14)
+        draw = ImageDraw.Draw(canvas)
+        for label, img, (row, col, x, y) in zip(request.labels, images, positions):
+            label_x = col * cell_w + request.spacing + max_w // 2
+            if request.label_position == "bottom":
+                label_y = y + img.height + 5
+            else:
+                label_y = row * cell_h + request.spacing + 5
+
+            # Center text
+            bbox = draw.textbbox((0, 0), label, font=font)
+            text_w = bbox[2] - bbox[0]
+            draw.text((label_x - text_w // 2, label_y), label, fill=(0, 0, 0), font=font)
+
+    # Encode output
+    save_format = _montage_save_format(request)
+    save_kwargs = {}
+    if save_format == 'PNG':
+        save_kwargs['compress_level'] = 1
+
+    buffer = save_image(canvas, save_format, **save_kwargs)
+    return _montage_response(request, buffer.getvalue(), canvas_w, canvas_h, cols, rows)
+
+
+def _build_montage_vips(request: MontageRequest, images: List[bytes]) -> Union[MontageResponse, Response]:
+    """Large-montage path through libvips (runs in the threadpool)."""
+    cols, rows = _montage_grid(request)
+    data, canvas_w, canvas_h = vips_montage.build_montage(
+        images,
+        cols=cols,
+        rows=rows,
+        spacing=request.spacing,
+        background=_parse_color(request.background_color),
+        max_cell_width=request.max_cell_width,
+        save_format=_montage_save_format(request),
+    )
+    return _montage_response(request, data, canvas_w, canvas_h, cols, rows)
+
+
 @router.post("/montage", response_model=MontageResponse)
-async def create_montage(request: MontageRequest) -> MontageResponse:
+async def create_montage(request: MontageRequest) -> Union[MontageResponse, Response]:
     """
     Combine multiple images into a grid/montage layout.
 
@@ -174,119 +449,62 @@ async def create_montage(request: MontageRequest) -> MontageResponse:
     - Multi-image context for vision LLMs
     - Contact sheets for review
     """
-    from PIL import Image, ImageDraw, ImageFont
-    from io import BytesIO
-    import base64
-    import math
-
     try:
-        # Decode all images
-        images = []
-        for i, img_b64 in enumerate(request.images):
-            try:
-                img_data = base64.b64decode(img_b64)
-                img = Image.open(BytesIO(img_data))
-                if img.mode != 'RGBA':
-                    img = img.convert('RGBA')
-                images.append(img)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Failed to decode image {i}: {str(e)}")
-
-        # Calculate grid dimensions
-        n = len(images)
-        if request.columns:
-            cols = request.columns
-        else:
-            # Auto-calculate: prefer roughly square grids
-            cols = math.ceil(math.sqrt(n))
-        rows = math.ceil(n / cols)
+        # Decode base64 and open all images (header only) in parallel
+        loop = asyncio.get_running_loop()
+        opened = await asyncio.gather(*(
+            loop.run_in_executor(_DECODE_POOL, _open_montage_image, img_b64, i)
+            for i, img_b64 in enumerate(request.images)
+        ))
+        datas = [data for data, _ in opened]
+        images = [img for _, img in opened]
+        del opened
 
         # Find max dimensions (or use max_cell_width to constrain)
         max_w = max(img.width for img in images)
         max_h = max(img.height for img in images)
 
+        scale = None
         if request.max_cell_width and max_w > request.max_cell_width:
+            # Scale all images proportionally
             scale = request.max_cell_width / max_w
             max_w = request.max_cell_width
             max_h = int(max_h * scale)
-            # Scale all images proportionally
-            scaled_images = []
-            for img in images:
-                new_w = int(img.width * scale)
-                new_h = int(img.height * scale)
-                scaled_images.append(img.resize((new_w, new_h), Image.Resampling.LANCZOS))
-            images = scaled_images
-
-        # Add space for labels if provided
-        label_height = 25 if request.labels else 0
-
-        # Calculate canvas size
-        cell_w = max_w + request.spacing
-        cell_h = max_h + request.spacing + label_height
-        canvas_w = cols * cell_w + request.spacing
-        canvas_h = rows * cell_h + request.spacing
-
-        # Parse background color
-        bg_color = request.background_color.lstrip('#')
-        bg_rgb = tuple(int(bg_color[i:i+2], 16) for i in (0, 2, 4))
-
-        # Create canvas
-        canvas = Image.new('RGB', (canvas_w, canvas_h), bg_rgb)
-
-        # Try to load a font for labels
-        font = None
-        if request.labels:
+        targets = [_montage_target(img, scale, i) for i, img in enumerate(images)]
+
+        # Large unlabeled montages go through the streaming libvips pipeline
+        cols, rows = _montage_grid(request)
+        label_height = MONTAGE_LABEL_HEIGHT if request.labels else 0
+        canvas_w = cols * (max_w + request.spacing) + request.spacing
+        canvas_h = rows * (max_h + request.spacing + label_height) + request.spacing
+        if not request.labels and vips_montage.should_use_vips(
+            canvas_w * canvas_h, [img.size for img in images], [img.mode for img in images]
+        ):
             try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-            except:
-                font = ImageFont.load_default()
-
-        # Place images
-        draw = ImageDraw.Draw(canvas) if request.labels else None
-        for i, img in enumerate(images):
-            row = i // cols
-            col = i % cols
-
-            # Calculate position (center in cell)
-            x = col * cell_w + request.spacing + (max_w - img.width) // 2
-            y = row * cell_h + request.spacing
-
-            if request.label_position == "top" and request.labels:
-                y += label_height
-
-            # Paste image (handle transparency)
-            if img.mode == 'RGBA':
-                canvas.paste(img, (x, y), img)
-            else:
-                canvas.paste(img, (x, y))
-
-            # Add label
-            if request.labels and i < len(request.labels) and draw:
-                label = request.labels[i]
-                label_x = col * cell_w + request.spacing + max_w // 2
-                if request.label_position == "bottom":
-                    label_y = y + img.height + 5
-                else:
-                    label_y = row * cell_h + request.spacing + 5
-
-                # Center text
-                bbox = draw.textbbox((0, 0), label, font=font)
-                text_w = bbox[2] - bbox[0]
-                draw.text((label_x - text_w // 2, label_y), label, fill=(0, 0, 0), font=font)
-
-        # Encode output
-        buffer = BytesIO()
-        save_format = 'JPEG' if request.output_format.lower() in ['jpg', 'jpeg'] else 'PNG'
-        if save_format == 'JPEG':
-            canvas = canvas.convert('RGB')
-        canvas.save(buffer, format=save_format)
-
-        return MontageResponse(
-            image_base64=base64.b64encode(buffer.getvalue()).decode('utf-8'),
-            width=canvas_w,
-            height=canvas_h,
-            grid=f"{cols}x{rows}",
-        )
+                return await run_in_threadpool(_build_montage_vips, request, datas)
+            except vips_montage.VipsMontageError:
+                # libvips decodes lazily and can't say which input failed; the
+                # Pillow path below reports it as "Failed to decode image i"
+                pass
+        del datas
+
+        # The Pillow path holds the whole canvas in memory; refuse canvases
+        # Pillow itself would treat as a decompression bomb
+        if canvas_w * canvas_h > Image.MAX_IMAGE_PIXELS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Montage canvas {canvas_w}x{canvas_h} exceeds {Image.MAX_IMAGE_PIXELS} pixels; "
+                       "use max_cell_width or fewer images",
+            )
+
+        # Decode and scale all images in parallel (Pillow's decoders release the GIL)
+        images = list(await asyncio.gather(*(
+            loop.run_in_executor(_DECODE_POOL, _load_montage_image, img, target, i)
+            for i, (img, target) in enumerate(zip(images, targets))
+        )))
+
+        # Layout and encode off the event loop
+        return await run_in_threadpool(_build_montage, request, images, max_w, max_h)
 
     except HTTPException:
         raise
@@ -0,0 +1,36 @@
+"""
+Shared font loading for image labels.
+
+Fonts are loaded once per size and reused across requests, instead of
+re-reading and parsing the TTF on every call.
+"""
+
+from PIL import ImageFont
+
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+_FONT_CACHE: dict[int, ImageFont.FreeTypeFont | ImageFont.ImageFont] = {}
+
+
+def get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """
+    Get the label font at the given size, loading it on first use.
+
+    Falls back to Pillow's default bitmap font if DejaVu Sans is unavailable;
+    the fallback is cached too, so the failed load is only attempted once.
+
+    Args:
+        size: Font size in points
+
+    Returns:
+        Loaded font
+    """
+    font = _FONT_CACHE.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype(FONT_PATH, size)
+        except (IOError, OSError, ImportError):
+            font = ImageFont.load_default()
+        _FONT_CACHE[size] = font
+    return font
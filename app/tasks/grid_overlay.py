@@ -8,9 +8,16 @@ Based on Grid-Augmented Vision research (arXiv:2411.18270)
 Ported from ~/ops/aston/scripts/grid_overlay.py
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from io import BytesIO
-import base64
+from typing import Optional
+import functools
+
+import numpy as np
+from numba import njit
+
+from app.tasks.fonts import get_font
+from app.tasks.image_io import decode_image, save_image, to_rgb_or_rgba
 
 
 # Prompt prefix to explain the grid overlay to vision LLMs
@@ -21,27 +28,33 @@ Ignore the grid and white border when evaluating the UI design.
 
 """
 
+# Dark gray for readability
+LABEL_COLOR = (80, 80, 80, 255)
+
 
-def get_ux_review_prompt(focus_areas: list[str] = None) -> str:
+@functools.lru_cache(maxsize=32)
+def get_ux_review_prompt(focus_areas: Optional[tuple[str, ...]] = None) -> str:
     """
     Generate a complete prompt for UX screenshot review.
 
+    Results are memoized, so focus_areas must be hashable (a tuple).
+
     Args:
-        focus_areas: Optional list of specific areas to check.
+        focus_areas: Optional tuple of specific areas to check.
                     Defaults to common UX issues.
 
     Returns:
         Complete prompt string with grid explanation.
     """
     if focus_areas is None:
-        focus_areas = [
+        focus_areas = (
             "Misaligned or inconsistently spaced elements",
             "Text truncation, overflow, or label issues",
             "Visual hierarchy problems",
             "Inconsistent padding or margins",
             "Accessibility concerns (contrast, touch target size)",
             "Broken or placeholder content",
-        ]
+        )
 
     checks = "\n".join(f"- {area}" for area in focus_areas)
 
@@ -56,6 +69,137 @@ Check for:
 If no issues are found in a category, skip it. Be specific and actionable."""
 
 
+@functools.lru_cache(maxsize=64)
+def _glyph(label: str, font_size: int) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    Rasterize a grid label once and reuse it across requests.
+
+    Args:
+        label: Label text (e.g. "C" or "12")
+        font_size: Font size in points
+
+    Returns:
+        Tuple of (HxW uint8 coverage mask, (left, top) offset of the mask
+        relative to the text origin)
+    """
+    font = get_font(font_size)
+    left, top, right, bottom = font.getbbox(label)
+    mask = Image.new('L', (right - left, bottom - top), 0)
+    ImageDraw.Draw(mask).text((-left, -top), label, fill=255, font=font)
+    return np.asarray(mask), (left, top)
+
+
+def _blend255(mask: np.ndarray, dst: np.ndarray, src: np.ndarray) -> np.ndarray:
+    """Pillow's rounded integer blend: dst*(255-mask)/255 + src*mask/255."""
+    tmp = dst * (255 - mask) + src * mask + 128
+    return ((tmp >> 8) + tmp) >> 8
+
+
+def _paste_glyph(arr: np.ndarray, mask: np.ndarray, x: int, y: int) -> None:
+    """
+    Blend LABEL_COLOR into an image array through a glyph mask, in place.
+
+    Equivalent to Image.paste(color, (x, y), mask), including clipping at the
+    array edges and the alpha channel of 4-channel arrays.
+    """
+    h, w = mask.shape
+    x0, y0 = max(x, 0), max(y, 0)
+    region = arr[y0:y + h, x0:x + w]
+    m = mask[y0 - y:y0 - y + region.shape[0], x0 - x:x0 - x + region.shape[1], None].astype(np.int32)
+    dst = region.astype(np.int32)
+    color = np.asarray(LABEL_COLOR, dtype=np.int32)
+
+    color_mask = m
+    if region.shape[2] == 4:
+        # Like Pillow, fully transparent pixels under the glyph take the label color
+        color_mask = np.where((m != 0) & (dst[..., 3:] == 0), 255, m)
+        region[..., 3:] = _blend255(m, dst[..., 3:], color[3])
+    region[..., :3] = _blend255(color_mask, dst[..., :3], color[:3])
+
+
+@njit(cache=True)
+def _composite_pixel(arr: np.ndarray, y: int, x: int, color: np.ndarray, src_a: int) -> None:
+    """
+    Composite one line pixel over arr[y, x] ("over" operator), in place.
+
+    Same integer arithmetic as Pillow's Image.alpha_composite, so results match
+    the overlay-based rendering exactly. 3-channel arrays are treated as opaque.
+    """
+    dst_a = arr[y, x, 3] if arr.shape[2] == 4 else 255
+    out_a255 = src_a * 255 + dst_a * (255 - src_a)
+    coef1 = src_a * 255 * 255 * 128 // out_a255
+    coef2 = 255 * 128 - coef1
+    for c in range(3):
+        tmp = color[c] * coef1 + arr[y, x, c] * coef2 + (0x80 << 7)
+        arr[y, x, c] = ((((tmp >> 8) + tmp) >> 8) >> 7)
+    if arr.shape[2] == 4:
+        tmp = out_a255 + 0x80
+        arr[y, x, 3] = ((tmp >> 8) + tmp) >> 8
+
+
+@njit(cache=True)
+def _blend_kernel(
+    arr: np.ndarray,
+    line_cols: np.ndarray,
+    on_hline: np.ndarray,
+    color: np.ndarray,
+    src_a: int,
+) -> None:
+    """
+    Composite grid line pixels.
+
+    Rows on a horizontal line are blended across their full width; other rows
+    only at the vertical line columns. Each pixel is blended at most once.
+
+    Single-threaded on purpose: requests already run on the threadpool, and
+    Numba's default (workqueue) threading layer aborts when parallel kernels
+    are entered from several threads at once.
+    """
+    for y in range(arr.shape[0]):
+        if on_hline[y]:
+            for x in range(arr.shape[1]):
+                _composite_pixel(arr, y, x, color, src_a)
+        else:
+            for x in line_cols:
+                _composite_pixel(arr, y, x, color, src_a)
+
+
+def _blend_lines(
+    arr: np.ndarray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    color: tuple[int, int, int],
+    alpha: float,
+    line_width: int,
+) -> None:
+    """
+    Alpha-blend full-length grid lines into an image array in place.
+
+    Pixels where a vertical and a horizontal line cross are blended once,
+    matching a single overlay composited on top with Image.alpha_composite
+    (including the alpha channel of 4-channel arrays).
+
+    Args:
+        arr: HxWxC uint8 image array (modified in place)
+        xs: Left edge of each vertical line
+        ys: Top edge of each horizontal line
+        color: RGB line color
+        alpha: Line opacity (0-1)
+        line_width: Line thickness in pixels
+    """
+    h, w = arr.shape[:2]
+    offsets = np.arange(line_width)
+
+    line_cols = np.unique(np.add.outer(xs, offsets))
+    line_cols = line_cols[line_cols < w]
+
+    on_hline = np.zeros(h, dtype=np.bool_)
+    line_rows = np.add.outer(ys, offsets).ravel()
+    on_hline[line_rows[line_rows < h]] = True
+
+    _blend_kernel(arr, line_cols, on_hline, np.asarray(color, dtype=np.int64), int(255 * alpha))
+
+
 def add_reference_grid(
     img: Image.Image,
     grid_size: int = 9,
@@ -74,99 +218,73 @@ def add_reference_grid(
         line_width: Grid line thickness
 
     Returns:
-        New image with grid overlay and labels
+        New image with grid overlay and labels (RGBA if the input has
+        transparency, otherwise RGB)
     """
     orig_w, orig_h = img.size
 
-    # Create new canvas with white margins
+    # Stay in RGB unless the input has real transparency
+    src = np.asarray(to_rgb_or_rgba(img))
+    channels = src.shape[2]
+
+    # Create new canvas with white margins and copy the original image in
+    # centered. Built directly as an array so the grid can be blended in place
+    # without an extra full-frame copy.
     new_w = orig_w + (margin * 2)
     new_h = orig_h + (margin * 2)
-    canvas = Image.new('RGBA', (new_w, new_h), (255, 255, 255, 255))
+    arr = np.full((new_h, new_w, channels), 255, dtype=np.uint8)
+    arr[margin:margin + orig_h, margin:margin + orig_w] = src
 
-    # Paste original image centered
-    canvas.paste(img.convert('RGBA'), (margin, margin))
+    # Grid line coordinates, shared by the lines and the label placement
+    steps = np.arange(grid_size + 1)
+    xs = margin + (orig_w * steps) // grid_size
+    ys = margin + (orig_h * steps) // grid_size
 
-    # Create overlay for grid lines
-    overlay = Image.new('RGBA', (new_w, new_h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
+    # Blend grid lines directly into the pixel buffer (extend into margins).
+    # Only the line pixels are touched, instead of compositing a full-frame overlay.
+    _blend_lines(arr, xs, ys, (0, 0, 0), alpha, line_width)
 
-    line_color = (0, 0, 0, int(255 * alpha))
-
-    # Draw vertical lines (extend into margins)
-    for i in range(grid_size + 1):
-        x = margin + (orig_w * i // grid_size)
-        draw.line([(x, 0), (x, new_h)], fill=line_color, width=line_width)
-
-    # Draw horizontal lines (extend into margins)
-    for i in range(grid_size + 1):
-        y = margin + (orig_h * i // grid_size)
-        draw.line([(0, y), (new_w, y)], fill=line_color, width=line_width)
-
-    # Composite grid onto canvas
-    canvas = Image.alpha_composite(canvas, overlay)
-
-    # Draw labels
-    label_draw = ImageDraw.Draw(canvas)
-
-    # Try to get a small font, fall back to default
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
-    except (IOError, OSError):
-        font = ImageFont.load_default()
-
-    label_color = (80, 80, 80, 255)  # Dark gray for readability
+    # Draw labels from cached glyph masks, also straight into the array
+    font_size = 10
+    cell_centers_x = ((xs[:-1] + xs[1:]) // 2).tolist()
+    cell_centers_y = ((ys[:-1] + ys[1:]) // 2).tolist()
 
     # Column labels (A-I) - centered in each cell
     col_labels = [chr(ord('A') + i) for i in range(grid_size)]
-    for i, label in enumerate(col_labels):
-        cell_center_x = margin + (orig_w * i // grid_size) + (orig_w // grid_size // 2)
+    for label, cell_center_x in zip(col_labels, cell_centers_x):
+        mask, (left, top) = _glyph(label, font_size)
+        x = cell_center_x - mask.shape[1] // 2 + left
 
         # Top label
-        bbox = label_draw.textbbox((0, 0), label, font=font)
-        text_w = bbox[2] - bbox[0]
-        label_draw.text(
-            (cell_center_x - text_w // 2, 2),
-            label, fill=label_color, font=font
-        )
+        _paste_glyph(arr, mask, x, 2 + top)
 
         # Bottom label
-        label_draw.text(
-            (cell_center_x - text_w // 2, new_h - margin + 3),
-            label, fill=label_color, font=font
-        )
+        _paste_glyph(arr, mask, x, new_h - margin + 3 + top)
 
     # Row labels (1-9) - centered in each cell
     row_labels = [str(i + 1) for i in range(grid_size)]
-    for i, label in enumerate(row_labels):
-        cell_center_y = margin + (orig_h * i // grid_size) + (orig_h // grid_size // 2)
-
-        bbox = label_draw.textbbox((0, 0), label, font=font)
-        text_h = bbox[3] - bbox[1]
+    for label, cell_center_y in zip(row_labels, cell_centers_y):
+        mask, (left, top) = _glyph(label, font_size)
+        y = cell_center_y - mask.shape[0] // 2 + top
 
         # Left label
-        label_draw.text(
-            (4, cell_center_y - text_h // 2),
-            label, fill=label_color, font=font
-        )
+        _paste_glyph(arr, mask, 4 + left, y)
 
         # Right label
-        label_draw.text(
-            (new_w - margin + 4, cell_center_y - text_h // 2),
-            label, fill=label_color, font=font
-        )
+        _paste_glyph(arr, mask, new_w - margin + 4 + left, y)
 
-    return canvas
+    return Image.fromarray(arr, mode='RGBA' if channels == 4 else 'RGB')
 
 
-def process_base64(
+def process_to_buffer(
     image_base64: str,
     grid_size: int = 9,
     alpha: float = 0.3,
     margin: int = 15,
     output_format: str = "png",
-) -> str:
+) -> BytesIO:
     """
-    Process a base64-encoded image and return the result as base64.
+    Process a base64-encoded image and return the encoded result.
 
     Args:
         image_base64: Base64-encoded input image
@@ -176,20 +294,21 @@ def process_base64(
         output_format: Output image format (png, jpeg)
 
     Returns:
-        Base64-encoded output image
+        Buffer holding the encoded output image
     """
     # Decode input
-    image_data = base64.b64decode(image_base64)
-    img = Image.open(BytesIO(image_data))
+    img = decode_image(image_base64)
 
     # Process
     result = add_reference_grid(img, grid_size=grid_size, alpha=alpha, margin=margin)
 
     # Convert to RGB if saving as JPEG
-    if output_format.lower() in ['jpg', 'jpeg']:
+    if output_format.lower() in ['jpg', 'jpeg'] and result.mode != 'RGB':
         result = result.convert('RGB')
 
-    # Encode output
-    buffer = BytesIO()
-    result.save(buffer, format=output_format.upper())
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # Encode output (zlib level 1: grid overlays are mostly flat regions, so higher
+    # levels cost several times the CPU for little size gain)
+    save_kwargs = {}
+    if output_format.lower() == 'png':
+        save_kwargs['compress_level'] = 1
+    return save_image(result, output_format.upper(), **save_kwargs)
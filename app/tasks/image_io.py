@@ -0,0 +1,92 @@
+"""
+Base64 <-> Pillow image helpers shared by the image endpoints.
+
+Pillow keeps the BytesIO it was opened from (img.fp) after load(), so the
+decoded bytes live as long as the opened image; drop the image once it has
+been converted or resized to release them.
+"""
+
+from PIL import Image
+from io import BytesIO
+import pybase64 as base64
+
+
+def decode_bytes(image_base64: str) -> bytes:
+    """
+    Decode a base64 string to the encoded image bytes.
+
+    Args:
+        image_base64: Base64-encoded input image
+
+    Returns:
+        Encoded image bytes (PNG, JPEG, ...)
+    """
+    return base64.b64decode(image_base64)
+
+
+def decode_image(image_base64: str) -> Image.Image:
+    """
+    Open a base64-encoded image.
+
+    The image is opened lazily, so callers can still use Image.draft() before
+    the pixel data is decoded.
+
+    Args:
+        image_base64: Base64-encoded input image
+
+    Returns:
+        Opened (not yet loaded) PIL Image
+    """
+    return Image.open(BytesIO(decode_bytes(image_base64)))
+
+
+def to_rgb_or_rgba(img: Image.Image) -> Image.Image:
+    """
+    Convert an image to RGBA if it has real transparency, otherwise to RGB.
+
+    Inputs with an alpha channel (or a transparency key) that turns out to be
+    fully opaque come back as RGB, so per-pixel work touches 3 bytes instead
+    of 4 and they can be copied without a mask.
+
+    Args:
+        img: Input image
+
+    Returns:
+        The same image if already in the right mode, otherwise a converted copy
+    """
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        if img.mode != 'RGBA':
+            img = img.convert('RGBA')
+        if img.getextrema()[3][0] < 255:
+            return img
+    return img if img.mode == 'RGB' else img.convert('RGB')
+
+
+def save_image(img: Image.Image, format: str, **save_kwargs) -> BytesIO:
+    """
+    Save an image to an in-memory buffer.
+
+    Args:
+        img: Image to save
+        format: Pillow output format (PNG, JPEG)
+        **save_kwargs: Extra options passed to Image.save()
+
+    Returns:
+        Buffer holding the encoded image
+    """
+    buffer = BytesIO()
+    img.save(buffer, format=format, **save_kwargs)
+    return buffer
+
+
+def encode_bytes(data: bytes) -> str:
+    """
+    Base64-encode image bytes (or any bytes-like object) to a string.
+
+    Args:
+        data: Encoded image
+
+    Returns:
+        Base64-encoded image
+    """
+    return base64.b64encode_as_string(data)
@@ -0,0 +1,64 @@
+"""
+In-process cache of encoded image results.
+
+Grid overlay and resize are pure functions of (input image, params), and
+agents iterating on a screenshot often send the exact same request again.
+Results are keyed by a SHA-256 of the input and params and kept in an LRU
+bounded by total encoded bytes.
+"""
+
+from hashlib import sha256
+import threading
+
+from cachetools import LRUCache
+
+
+# Budget per worker process for cached output bytes
+RESULT_CACHE_BYTES = 32 * 1024 * 1024
+
+_RESULT_CACHE: LRUCache = LRUCache(maxsize=RESULT_CACHE_BYTES, getsizeof=lambda value: len(value[0]))
+_LOCK = threading.Lock()
+
+
+def make_key(endpoint: str, image_base64: str, params: dict) -> bytes:
+    """
+    Build a cache key for a request.
+
+    Args:
+        endpoint: Endpoint name, so different operations never collide
+        image_base64: Base64-encoded input image
+        params: Parameters that affect the output
+
+    Returns:
+        SHA-256 digest identifying the request
+    """
+    digest = sha256(endpoint.encode())
+    digest.update(image_base64.encode('ascii'))
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.digest()
+
+
+def get_result(key: bytes) -> tuple[bytes, dict] | None:
+    """
+    Look up a cached result.
+
+    Returns:
+        Tuple of (encoded image bytes, metadata), or None on a miss
+    """
+    with _LOCK:
+        return _RESULT_CACHE.get(key)
+
+
+def store_result(key: bytes, data: bytes, meta: dict | None = None) -> None:
+    """
+    Cache an encoded result. Results larger than the whole budget are skipped.
+
+    Args:
+        key: Key from make_key()
+        data: Encoded output image
+        meta: Extra response fields (e.g. output dimensions)
+    """
+    if len(data) > RESULT_CACHE_BYTES:
+        return
+    with _LOCK:
+        _RESULT_CACHE[key] = (data, meta or {})
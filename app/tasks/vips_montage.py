@@ -0,0 +1,147 @@
+"""
+libvips montage pipeline for large montages.
+
+libvips streams decode, resize and join as one lazy pipeline, so peak memory
+stays around a strip of the output instead of every decoded input plus the
+full canvas. pyvips is optional: VIPS_AVAILABLE is False when it (or the
+libvips shared library) is missing, and callers fall back to Pillow.
+"""
+
+try:
+    import pyvips
+    VIPS_AVAILABLE = True
+except (ImportError, OSError):
+    pyvips = None
+    VIPS_AVAILABLE = False
+
+
+# Use libvips once the output canvas or any decoded input reaches this many pixels
+VIPS_MIN_PIXELS = 16_000_000
+# Pillow modes libvips renders the same way as the Pillow path (CMYK and
+# 16-bit inputs are converted differently, so they stay on Pillow)
+VIPS_MODES = frozenset({'RGB', 'RGBA', 'L', 'LA', 'P'})
+
+
+class VipsMontageError(Exception):
+    """libvips failed to build the montage (e.g. an input did not decode)."""
+
+
+def should_use_vips(canvas_pixels: int, input_sizes: list[tuple[int, int]], modes: list[str]) -> bool:
+    """
+    Whether a montage is large enough to be worth the libvips pipeline.
+
+    Args:
+        canvas_pixels: Output canvas width * height
+        input_sizes: (width, height) of each input, before scaling
+        modes: Pillow mode of each input
+    """
+    if not VIPS_AVAILABLE or not VIPS_MODES.issuperset(modes):
+        return False
+    largest_input = max(w * h for w, h in input_sizes)
+    return max(canvas_pixels, largest_input) >= VIPS_MIN_PIXELS
+
+
+def build_montage(
+    images: list[bytes],
+    cols: int,
+    rows: int,
+    spacing: int,
+    background: tuple[int, int, int],
+    max_cell_width: int | None,
+    save_format: str,
+) -> tuple[bytes, int, int]:
+    """
+    Join images into a grid with libvips (no labels).
+
+    Matches the Pillow montage layout: cells are sized to the largest image,
+    images are centered horizontally and top-aligned, with `spacing` between
+    cells and around the edge.
+
+    Args:
+        images: Encoded input images
+        cols: Number of columns
+        rows: Number of rows
+        spacing: Spacing between images in pixels
+        background: RGB background color
+        max_cell_width: Max width per cell (scales all images down if needed)
+        save_format: Output format (PNG, JPEG)
+
+    Returns:
+        Tuple of (encoded image bytes, width, height)
+
+    Raises:
+        VipsMontageError: libvips could not decode an input or build the output
+    """
+    try:
+        return _build_montage(images, cols, rows, spacing, background, max_cell_width, save_format)
+    except pyvips.Error as e:
+        raise VipsMontageError(str(e)) from e
+
+
+def _build_montage(
+    images: list[bytes],
+    cols: int,
+    rows: int,
+    spacing: int,
+    background: tuple[int, int, int],
+    max_cell_width: int | None,
+    save_format: str,
+) -> tuple[bytes, int, int]:
+    """build_montage() without the error translation."""
+    bg = list(background)
+
+    # Open inputs (header only until the pipeline runs). Like Pillow, treat
+    # truncated inputs as errors instead of padding them with black.
+    tiles = [
+        pyvips.Image.new_from_buffer(data, "", access="sequential", fail_on="truncated")
+        for data in images
+    ]
+
+    # Find max dimensions (or use max_cell_width to constrain)
+    max_w = max(tile.width for tile in tiles)
+    max_h = max(tile.height for tile in tiles)
+
+    scale = None
+    if max_cell_width and max_w > max_cell_width:
+        scale = max_cell_width / max_w
+        max_w = max_cell_width
+        max_h = int(max_h * scale)
+
+    prepared = []
+    for tile in tiles:
+        if scale is not None:
+            # Same target size as the Pillow path
+            new_w = int(tile.width * scale)
+            new_h = int(tile.height * scale)
+            tile = tile.resize(new_w / tile.width, vscale=new_h / tile.height, kernel="lanczos3")
+        # Convert to 8-bit sRGB before flattening: 16-bit inputs (rgb16,
+        # grey16) would otherwise be flattened against an 8-bit background
+        if tile.interpretation != "srgb":
+            tile = tile.colourspace("srgb")
+        if tile.format != "uchar":
+            tile = tile.cast("uchar")
+        if tile.hasalpha():
+            tile = tile.flatten(background=bg)
+        prepared.append(tile)
+
+    joined = pyvips.Image.arrayjoin(
+        prepared,
+        across=cols,
+        shim=spacing,
+        hspacing=max_w,
+        vspacing=max_h,
+        halign="centre",
+        valign="low",
+        background=bg,
+    )
+
+    # Outer spacing, and pad a short last row out to the full grid
+    canvas_w = cols * (max_w + spacing) + spacing
+    canvas_h = rows * (max_h + spacing) + spacing
+    canvas = joined.embed(spacing, spacing, canvas_w, canvas_h, extend="background", background=bg)
+
+    if save_format == 'JPEG':
+        data = canvas.write_to_buffer(".jpg", Q=75)
+    else:
+        data = canvas.write_to_buffer(".png", compression=1)
+    return data, canvas_w, canvas_h
@@ -0,0 +1,93 @@
+"""
+Parity tests for the grid overlay blends against the Pillow operations they replace.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from app.tasks.grid_overlay import _blend_lines, _glyph, _paste_glyph, add_reference_grid
+
+
+def _overlay_reference(img: Image.Image, xs, ys, alpha: float) -> np.ndarray:
+    """Original rendering: draw lines on an RGBA overlay, then alpha_composite."""
+    w, h = img.size
+    overlay = Image.new('RGBA', (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    line_color = (0, 0, 0, int(255 * alpha))
+    for x in xs:
+        draw.line([(x, 0), (x, h)], fill=line_color, width=1)
+    for y in ys:
+        draw.line([(0, y), (w, y)], fill=line_color, width=1)
+    return np.asarray(Image.alpha_composite(img.convert('RGBA'), overlay))
+
+
+def _random_rgba(seed: int, opaque: bool) -> np.ndarray:
+    arr = np.random.default_rng(seed).integers(0, 256, (40, 50, 4), dtype=np.uint8)
+    if opaque:
+        arr[..., 3] = 255
+    return arr
+
+
+@pytest.mark.parametrize("alpha", [0.1, 0.3, 0.5, 1.0])
+@pytest.mark.parametrize("kind", ["opaque", "transparent", "palette"])
+def test_blend_lines_matches_alpha_composite(kind, alpha):
+    if kind == "palette":
+        img = Image.fromarray(_random_rgba(0, opaque=True)[..., :3], 'RGB').quantize(16)
+    else:
+        img = Image.fromarray(_random_rgba(1, opaque=kind == "opaque"), 'RGBA')
+    xs, ys = np.array([0, 17, 49]), np.array([0, 13, 39])
+    expected = _overlay_reference(img, xs, ys, alpha)
+
+    if kind == "transparent":
+        arr = np.array(img)
+        _blend_lines(arr, xs, ys, (0, 0, 0), alpha, 1)
+        np.testing.assert_array_equal(arr, expected)
+    else:
+        # Opaque inputs are blended as 3-channel arrays
+        arr = np.array(img.convert('RGB'))
+        _blend_lines(arr, xs, ys, (0, 0, 0), alpha, 1)
+        np.testing.assert_array_equal(arr, expected[..., :3])
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+@pytest.mark.parametrize("pos", [(5, 5), (-3, 2), (25, 27)])
+def test_paste_glyph_matches_image_paste(mode, pos):
+    mask, _ = _glyph("B", 10)
+    arr = np.random.default_rng(2).integers(0, 256, (30, 30, len(mode)), dtype=np.uint8)
+    if mode == "RGBA":
+        arr[::2, :, 3] = 0
+
+    img = Image.fromarray(arr.copy(), mode)
+    img.paste((80, 80, 80, 255)[:len(mode)], pos, Image.fromarray(mask, 'L'))
+    _paste_glyph(arr, mask, *pos)
+
+    np.testing.assert_array_equal(arr, np.asarray(img))
+
+
+def test_grid_on_transparent_input_keeps_line_alpha():
+    result = add_reference_grid(Image.new('RGBA', (90, 90), (0, 0, 0, 0)))
+    assert result.mode == 'RGBA'
+    # First vertical line, away from the labels
+    assert result.getpixel((15, 50)) == (0, 0, 0, 76)
+
+
+def test_grid_on_semi_transparent_input():
+    result = add_reference_grid(Image.new('RGBA', (90, 90), (255, 0, 0, 128)))
+    assert result.getpixel((15, 50)) == (138, 0, 0, 166)
+
+
+def test_grid_on_opaque_input_stays_rgb():
+    result = add_reference_grid(Image.new('RGB', (90, 90), (255, 255, 255)))
+    assert result.mode == 'RGB'
+    assert result.size == (120, 120)
+    assert result.getpixel((15, 50)) == (179, 179, 179)
+
+
+def test_grid_from_concurrent_threads():
+    img = Image.new('RGB', (300, 200), (255, 255, 255))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: add_reference_grid(img), range(32)))
+    assert all(r.tobytes() == results[0].tobytes() for r in results)
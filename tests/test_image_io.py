@@ -0,0 +1,26 @@
+"""
+Tests for the shared image helpers.
+"""
+
+import pytest
+from PIL import Image
+
+from app.tasks.image_io import to_rgb_or_rgba
+
+
+@pytest.mark.parametrize("img, mode", [
+    (Image.new('RGBA', (4, 4), (1, 2, 3, 255)), 'RGB'),
+    (Image.new('RGBA', (4, 4), (1, 2, 3, 254)), 'RGBA'),
+    (Image.new('LA', (4, 4), (9, 0)), 'RGBA'),
+    (Image.new('L', (4, 4), 9), 'RGB'),
+    (Image.new('RGB', (4, 4), 'red').quantize(4), 'RGB'),
+    (Image.new('CMYK', (4, 4)), 'RGB'),
+])
+def test_to_rgb_or_rgba(img, mode):
+    assert to_rgb_or_rgba(img).mode == mode
+
+
+def test_palette_transparency_kept():
+    img = Image.new('P', (4, 4), 0)
+    img.info['transparency'] = 0
+    assert to_rgb_or_rgba(img).mode == 'RGBA'
@@ -0,0 +1,230 @@
+"""
+Endpoint tests for /image.
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import image as image_router
+from app.tasks import result_cache, vips_montage
+from app.tasks.image_io import decode_bytes, encode_bytes, save_image
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    result_cache._RESULT_CACHE.clear()
+    yield
+    result_cache._RESULT_CACHE.clear()
+
+
+def _b64(img: Image.Image, format: str = 'PNG') -> str:
+    return encode_bytes(save_image(img, format).getvalue())
+
+
+def test_resize_rejects_zero_target_dimension():
+    response = client.post("/image/resize", json={
+        "image_base64": _b64(Image.new('RGB', (1000, 2), 'red')),
+        "width": 100,
+    })
+    assert response.status_code == 400
+    assert "too small" in response.json()["detail"]
+
+
+def test_resize_jpeg_rejects_zero_target_dimension():
+    response = client.post("/image/resize", json={
+        "image_base64": _b64(Image.new('RGB', (1000, 8), 'red'), 'JPEG'),
+        "max_dimension": 100,
+    })
+    assert response.status_code == 400
+    assert "too small" in response.json()["detail"]
+
+
+def test_montage_rejects_input_that_scales_to_zero():
+    response = client.post("/image/montage", json={
+        "images": [
+            _b64(Image.new('RGB', (1000, 20), 'red'), 'JPEG'),
+            _b64(Image.new('RGB', (4000, 40), 'blue')),
+        ],
+        "max_cell_width": 50,
+    })
+    assert response.status_code == 400
+    assert "Image 0" in response.json()["detail"]
+
+
+def test_binary_metadata_headers_exposed_to_browsers():
+    response = client.post("/image/resize", headers={"Origin": "https://example.com"}, json={
+        "image_base64": _b64(Image.new('RGB', (40, 20), 'red')),
+        "width": 20,
+        "response_format": "binary",
+    })
+    assert response.status_code == 200
+    exposed = response.headers["access-control-expose-headers"]
+    assert "X-Image-Width" in exposed and "X-Image-Height" in exposed
+    assert response.headers["X-Image-Width"] == "20"
+
+
+def test_montage_blend_matches_paste():
+    rng = np.random.default_rng(3)
+    rgba = Image.fromarray(rng.integers(0, 256, (30, 40, 4), dtype=np.uint8), 'RGBA')
+    rgb = Image.fromarray(rng.integers(0, 256, (20, 24, 3), dtype=np.uint8), 'RGB')
+    response = client.post("/image/montage", json={
+        "images": [_b64(rgba), _b64(rgb)],
+        "spacing": 10,
+        "background_color": "#336699",
+        "response_format": "binary",
+    })
+    assert response.status_code == 200
+
+    # Original rendering: paste each image onto the background, using its alpha as the mask
+    expected = Image.new('RGB', (2 * 50 + 10, 30 + 20), (0x33, 0x66, 0x99))
+    expected.paste(rgba, (10, 10), rgba)
+    expected.paste(rgb, (60 + (40 - 24) // 2, 10))
+
+    result = Image.open(BytesIO(response.content))
+    np.testing.assert_array_equal(np.asarray(result), np.asarray(expected))
+
+
+def _montage(images, **params) -> tuple[dict, np.ndarray]:
+    response = client.post("/image/montage", json={"images": images, "response_format": "binary", **params})
+    assert response.status_code == 200, response.text
+    return response.headers, np.asarray(Image.open(BytesIO(response.content)).convert('RGB')).astype(int)
+
+
+def _png16(arr: np.ndarray, interpretation: str) -> str:
+    """Base64 16-bit PNG (Pillow can't write 16-bit images with alpha)."""
+    h, w, bands = arr.shape
+    img = vips_montage.pyvips.Image.new_from_memory(arr.tobytes(), w, h, bands, "ushort")
+    return encode_bytes(img.copy(interpretation=interpretation).write_to_buffer(".png"))
+
+
+@pytest.mark.skipif(not vips_montage.VIPS_AVAILABLE, reason="libvips not installed")
+@pytest.mark.parametrize("max_cell_width", [None, 60])
+def test_vips_montage_layout_matches_pillow(monkeypatch, max_cell_width):
+    rng = np.random.default_rng(4)
+    rgba = rng.integers(0, 256, (50, 70, 4), dtype=np.uint8)
+    rgba[..., 3] = rng.choice([0, 128, 255], (50, 70))
+    images = [
+        _b64(Image.fromarray(rgba, 'RGBA')),
+        _b64(Image.new('RGB', (40, 90), 'red'), 'JPEG'),
+        _b64(Image.new('L', (100, 30), 200)),
+        _b64(Image.new('RGB', (30, 30), 'blue').quantize(4)),
+        _b64(Image.new('RGB', (64, 48), 'green')),
+        # 16-bit RGBA and grey+alpha PNGs, which Pillow opens as RGBA
+        _png16(rgba.astype(np.uint16) * 257, "rgb16"),
+        _png16(rgba[..., 2:].astype(np.uint16) * 257, "grey16"),
+    ]
+    params = {"columns": 2, "spacing": 7, "background_color": "#336699", "max_cell_width": max_cell_width}
+
+    monkeypatch.setattr(vips_montage, "VIPS_MIN_PIXELS", 10 ** 12)
+    pillow_headers, pillow = _montage(images, **params)
+    monkeypatch.setattr(vips_montage, "VIPS_MIN_PIXELS", 0)
+    calls = []
+    build = vips_montage.build_montage
+    monkeypatch.setattr(vips_montage, "build_montage", lambda *a, **kw: calls.append(1) or build(*a, **kw))
+    vips_headers, vips = _montage(images, **params)
+    assert calls
+
+    for header in ("X-Image-Width", "X-Image-Height", "X-Grid"):
+        assert vips_headers[header] == pillow_headers[header]
+    if max_cell_width is None:
+        # Same placement; only rounding differs in the alpha blend and JPEG decode
+        assert np.abs(vips - pillow).max() <= 2
+    else:
+        # Resampling kernels differ slightly, placement must not
+        assert np.abs(vips - pillow).mean() < 2
+
+
+def test_vips_montage_decode_error_names_image(monkeypatch):
+    monkeypatch.setattr(vips_montage, "VIPS_MIN_PIXELS", 0)
+    good = _b64(Image.new('RGB', (40, 40), 'red'))
+    truncated = save_image(Image.new('RGB', (40, 40), 'blue'), 'PNG').getvalue()[:-40]
+    response = client.post("/image/montage", json={"images": [good, encode_bytes(truncated)]})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Failed to decode image 1:")
+
+
+@pytest.mark.skipif(not vips_montage.VIPS_AVAILABLE, reason="libvips not installed")
+def test_vips_gate_uses_pixels_and_modes():
+    big = vips_montage.VIPS_MIN_PIXELS
+    assert not vips_montage.should_use_vips(1000, [(10, 10)] * 20, ['RGB'] * 20)
+    assert vips_montage.should_use_vips(big, [(10, 10)], ['RGB'])
+    assert vips_montage.should_use_vips(1000, [(big, 1)], ['P'])
+    assert not vips_montage.should_use_vips(big, [(10, 10)], ['CMYK'])
+    assert not vips_montage.should_use_vips(big, [(10, 10)], ['I;16'])
+
+
+def test_montage_rejects_canvas_over_max_image_pixels(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 5000)
+    response = client.post("/image/montage", json={
+        "images": [_b64(Image.new('RGB', (40, 40), 'red'))] * 2,
+        "labels": ["a", "b"],
+    })
+    assert response.status_code == 400
+    assert "exceeds 5000 pixels" in response.json()["detail"]
+
+
+def _count_calls(monkeypatch, name: str) -> list:
+    """Count calls to a render function in the image router."""
+    calls = []
+    func = getattr(image_router, name)
+    monkeypatch.setattr(image_router, name, lambda *a, **kw: calls.append(1) or func(*a, **kw))
+    return calls
+
+
+def test_resize_repeat_is_cache_hit(monkeypatch):
+    calls = _count_calls(monkeypatch, "_render_resize")
+    body = {"image_base64": _b64(Image.new('RGB', (40, 20), 'red')), "width": 20}
+    first = client.post("/image/resize", json=body).json()
+    second = client.post("/image/resize", json=body).json()
+    assert len(calls) == 1
+    assert second == first
+    assert (second["width"], second["height"]) == (20, 10)
+
+
+@pytest.mark.parametrize("change", [{"width": 30}, {"output_format": "jpeg"}])
+def test_resize_param_change_is_cache_miss(monkeypatch, change):
+    calls = _count_calls(monkeypatch, "_render_resize")
+    body = {"image_base64": _b64(Image.new('RGB', (40, 20), 'red')), "width": 20}
+    client.post("/image/resize", json=body)
+    response = client.post("/image/resize", json={**body, **change})
+    assert len(calls) == 2
+    assert response.json()["width"] == change.get("width", 20)
+
+
+def test_grid_overlay_cache_hit_and_alpha_miss(monkeypatch):
+    calls = _count_calls(monkeypatch, "process_to_buffer")
+    body = {"image_base64": _b64(Image.new('RGB', (40, 20), 'white'))}
+    first = client.post("/image/grid-overlay", json=body).json()
+    assert client.post("/image/grid-overlay", json=body).json() == first
+    assert len(calls) == 1
+
+    other = client.post("/image/grid-overlay", json={**body, "alpha": 0.5}).json()
+    assert len(calls) == 2
+    assert other["image_base64"] != first["image_base64"]
+
+
+def test_json_and_binary_share_cache_entry(monkeypatch):
+    calls = _count_calls(monkeypatch, "_render_resize")
+    body = {"image_base64": _b64(Image.new('RGB', (40, 20), 'red')), "width": 20}
+    as_json = client.post("/image/resize", json=body).json()
+    as_binary = client.post("/image/resize", json={**body, "response_format": "binary"})
+    assert len(calls) == 1
+    assert as_binary.content == decode_bytes(as_json["image_base64"])
+    assert (as_binary.headers["X-Image-Width"], as_binary.headers["X-Image-Height"]) == ("20", "10")
+
+
+def test_results_over_budget_are_not_cached(monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_BYTES", 10)
+    calls = _count_calls(monkeypatch, "_render_resize")
+    body = {"image_base64": _b64(Image.new('RGB', (40, 20), 'red')), "width": 20}
+    client.post("/image/resize", json=body)
+    client.post("/image/resize", json=body)
+    assert len(calls) == 2
+    assert len(result_cache._RESULT_CACHE) == 0